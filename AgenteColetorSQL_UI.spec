@@ -5,7 +5,7 @@ a = Analysis(
     ['src\\ui.py'],
     pathex=[],
     binaries=[],
-    datas=[],
+    datas=[('src\\static', 'static')],
     hiddenimports=[],
     hookspath=[],
     hooksconfig={},
@@ -1,64 +1,166 @@
 from __future__ import annotations
 
 from pathlib import Path
-import json
+from threading import Lock
 import os
 import tempfile
 from typing import Dict, Iterable, List
 
+import orjson
+
 
 QueueItem = Dict[str, object]
 
+_pending: List[bytes] = []
+_pending_bytes = 0
+_pending_lock = Lock()
+
+
+def _pos_path(path: Path) -> Path:
+    return path.with_name(path.name + ".pos")
+
+
+def _read_offset(path: Path) -> int:
+    try:
+        return int(_pos_path(path).read_text(encoding="utf-8").strip() or 0)
+    except (OSError, ValueError):
+        return 0
+
+
+def _write_offset(path: Path, offset: int) -> None:
+    _pos_path(path).write_text(str(offset), encoding="utf-8")
+
+
+def _clear_offset(path: Path) -> None:
+    try:
+        _pos_path(path).unlink()
+    except FileNotFoundError:
+        pass
+
 
 def load_queue(path: Path) -> List[QueueItem]:
-    if not path.exists():
+    try:
+        size = path.stat().st_size
+    except FileNotFoundError:
+        return []
+    if size == 0:
         return []
+    offset = _read_offset(path)
+    if offset >= size:
+        offset = 0
+    with path.open("rb") as handle:
+        handle.seek(offset)
+        data = handle.read()
     items: List[QueueItem] = []
-    with path.open("r", encoding="utf-8") as handle:
-        for line in handle:
-            line = line.strip()
-            if not line:
-                continue
-            try:
-                item = json.loads(line)
-            except json.JSONDecodeError:
-                continue
-            if isinstance(item, dict):
-                items.append(item)
+    for line in data.split(b"\n"):
+        if not line:
+            continue
+        try:
+            item = orjson.loads(line)
+        except orjson.JSONDecodeError:
+            continue
+        if isinstance(item, dict):
+            items.append(item)
     return items
 
 
 def _can_append(path: Path, max_mb: int) -> bool:
     if max_mb <= 0:
         return True
-    if not path.exists():
-        return True
-    size_mb = path.stat().st_size / (1024 * 1024)
-    return size_mb < max_mb
+    size = _pending_bytes
+    if path.exists():
+        size += path.stat().st_size
+    return size / (1024 * 1024) < max_mb
 
 
 def append_queue(path: Path, item: QueueItem, max_mb: int) -> bool:
-    if not _can_append(path, max_mb):
-        return False
-    path.parent.mkdir(parents=True, exist_ok=True)
-    with path.open("a", encoding="utf-8") as handle:
-        handle.write(json.dumps(item, separators=(",", ":"), default=str))
-        handle.write("\n")
+    global _pending_bytes
+    with _pending_lock:
+        if not _can_append(path, max_mb):
+            return False
+        line = orjson.dumps(item, default=str) + b"\n"
+        _pending.append(line)
+        _pending_bytes += len(line)
     return True
 
 
+def flush_queue(path: Path) -> None:
+    global _pending_bytes
+    with _pending_lock:
+        if not _pending:
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open("ab") as handle:
+            handle.write(b"".join(_pending))
+            handle.flush()
+            os.fsync(handle.fileno())
+        _pending.clear()
+        _pending_bytes = 0
+
+
+def consume_prefix(path: Path, n_items: int) -> None:
+    if n_items <= 0:
+        return
+    try:
+        size = path.stat().st_size
+    except FileNotFoundError:
+        return
+    offset = _read_offset(path)
+    if offset >= size:
+        offset = 0
+    # n_items counts parsed items, so advance past the same lines that
+    # load_queue skips (blank, unparseable, non-dict) without counting them.
+    with path.open("rb") as handle:
+        handle.seek(offset)
+        remaining = n_items
+        while remaining > 0:
+            line = handle.readline()
+            if not line:
+                break
+            offset += len(line)
+            payload = line.rstrip(b"\n")
+            if not payload:
+                continue
+            try:
+                item = orjson.loads(payload)
+            except orjson.JSONDecodeError:
+                continue
+            if isinstance(item, dict):
+                remaining -= 1
+    if offset >= size:
+        path.unlink()
+        _clear_offset(path)
+        return
+    if offset > size // 2:
+        with path.open("rb") as handle:
+            handle.seek(offset)
+            remainder = handle.read()
+        with tempfile.NamedTemporaryFile(
+            "wb", delete=False, dir=str(path.parent)
+        ) as handle:
+            handle.write(remainder)
+            temp_name = handle.name
+        os.replace(temp_name, path)
+        _clear_offset(path)
+        return
+    _write_offset(path, offset)
+
+
 def rewrite_queue(path: Path, items: Iterable[QueueItem]) -> None:
     items = list(items)
+    _clear_offset(path)
     if not items:
         if path.exists():
             path.unlink()
         return
     path.parent.mkdir(parents=True, exist_ok=True)
+    payload = b"".join(orjson.dumps(item, default=str) + b"\n" for item in items)
+    if not path.exists():
+        path.write_bytes(payload)
+        return
     with tempfile.NamedTemporaryFile(
-        "w", delete=False, encoding="utf-8", dir=str(path.parent)
+        "wb", delete=False, dir=str(path.parent)
     ) as handle:
-        for item in items:
-            handle.write(json.dumps(item, separators=(",", ":")))
-            handle.write("\n")
+        handle.write(payload)
         temp_name = handle.name
     os.replace(temp_name, path)
@@ -1,21 +1,71 @@
 from __future__ import annotations
 
+from dataclasses import dataclass, field
 from datetime import datetime, date
-from typing import List
+from functools import lru_cache
+import os
+import string
+import threading
+
 import pyodbc
 
 from config import IncrementalConfig, SourceConfig
 
+_DEBUG_TAP = bool(os.getenv("AGENT_DEBUG_TAP"))
+
+
+def enable_debug_tap() -> None:
+    global _DEBUG_TAP
+    _DEBUG_TAP = True
+
+
+@dataclass
+class RowBatch:
+    columns: list[str] = field(default_factory=list)
+    rows: list[tuple] = field(default_factory=list)
+
 
 _LAST_QUERY: dict[str, dict] = {}
 _LAST_SAMPLE: dict[str, list[dict]] = {}
 
+# pyodbc connections are not safe to share across threads mid-operation,
+# so each worker thread keeps its own cached connection.
+_LOCAL = threading.local()
+
+
+def _close_conn() -> None:
+    conn = getattr(_LOCAL, "conn", None)
+    if conn is not None:
+        try:
+            conn.close()
+        except pyodbc.Error:
+            pass
+    _LOCAL.conn = None
+    _LOCAL.conn_key = None
+
 
+def _get_conn(sql_conn: str) -> pyodbc.Connection:
+    conn = getattr(_LOCAL, "conn", None)
+    if conn is not None and getattr(_LOCAL, "conn_key", None) == sql_conn:
+        return conn
+    _close_conn()
+    conn = pyodbc.connect(sql_conn, autocommit=True)
+    conn.setdecoding(pyodbc.SQL_CHAR, encoding="utf-8")
+    conn.setdecoding(pyodbc.SQL_WCHAR, encoding="utf-16le")
+    _LOCAL.conn = conn
+    _LOCAL.conn_key = sql_conn
+    return conn
+
+
+_IDENTIFIER_CHARS = frozenset(string.ascii_letters + string.digits + "_")
+
+
+@lru_cache(maxsize=512)
 def _quote_identifier(name: str) -> str:
     parts = name.split(".")
     quoted_parts = []
     for part in parts:
-        if not part or not part.replace("_", "").isalnum():
+        if not part or not _IDENTIFIER_CHARS.issuperset(part):
             raise ValueError(f"Invalid SQL identifier: {name}")
         quoted_parts.append(f"[{part}]")
     return ".".join(quoted_parts)
@@ -32,26 +82,62 @@ def _build_select(source: SourceConfig) -> str:
     return ", ".join(columns)
 
 
-def _build_where(
-    incremental: IncrementalConfig,
-    last_id: int,
-    last_ts: datetime,
-    last_tie: int,
-    alias: str,
-) -> tuple[str, list]:
-    clauses = []
-    params: list = []
+def _build_where(incremental: IncrementalConfig, alias: str) -> str:
     if incremental.mode == "id":
-        id_sql = _qualified(alias, incremental.id_column)
-        clauses.append(f"{id_sql} > ?")
-        params.append(last_id)
-        return " AND ".join(clauses), params
-
+        return f"{_qualified(alias, incremental.id_column)} > ?"
     ts_sql = _qualified(alias, incremental.ts_column)
     tie_sql = _qualified(alias, incremental.tie_breaker)
-    clauses.append(f"({ts_sql} > ?) OR ({ts_sql} = ? AND {tie_sql} > ?)")
-    params.extend([last_ts, last_ts, last_tie])
-    return " AND ".join(clauses), params
+    return f"({ts_sql} > ?) OR ({ts_sql} = ? AND {tie_sql} > ?)"
+
+
+def _build_order_by(incremental: IncrementalConfig, alias: str) -> str:
+    if incremental.mode == "id":
+        return _qualified(alias, incremental.id_column)
+    return (
+        f"{_qualified(alias, incremental.ts_column)} ASC, "
+        f"{_qualified(alias, incremental.tie_breaker)} ASC"
+    )
+
+
+_QUERY_CACHE: dict[tuple, str] = {}
+
+
+def _build_query(source: SourceConfig, batch_size: int) -> str:
+    incremental = source.incremental
+    key = (
+        source.kind,
+        source.table,
+        source.query,
+        tuple(source.select),
+        source.filter,
+        incremental.mode,
+        incremental.id_column,
+        incremental.ts_column,
+        incremental.tie_breaker,
+        batch_size,
+    )
+    cached = _QUERY_CACHE.get(key)
+    if cached is not None:
+        return cached
+
+    if source.kind == "table":
+        alias = "t"
+        select_sql = _build_select(source)
+        from_sql = f"{_quote_identifier(source.table)} AS t"
+    else:
+        alias = "q"
+        select_sql = "*"
+        from_sql = f"({source.query}) AS q"
+    where_clauses = [_build_where(incremental, alias)]
+    if source.filter:
+        where_clauses.append(f"({source.filter})")
+    query = (
+        f"SELECT TOP ({batch_size}) {select_sql} FROM {from_sql}"
+        " WHERE " + " AND ".join(where_clauses)
+        + f" ORDER BY {_build_order_by(incremental, alias)}"
+    )
+    _QUERY_CACHE[key] = query
+    return query
 
 
 def _format_param(value) -> str:
@@ -72,7 +158,14 @@ def _format_query(query: str, params: list) -> str:
 
 
 def get_last_query(source_name: str) -> dict:
-    return _LAST_QUERY.get(source_name, {})
+    data = _LAST_QUERY.get(source_name)
+    if not data:
+        return {}
+    return {
+        "query": data["query"],
+        "params": data["params"],
+        "query_with_params": _format_query(data["query"], list(data["params"])),
+    }
 
 
 def get_last_sample(source_name: str) -> list[dict]:
@@ -86,67 +179,33 @@ def fetch_rows(
     last_ts: datetime,
     last_tie: int,
     batch_size: int,
-) -> List[dict]:
+) -> RowBatch:
     incremental = source.incremental
-    params: list = []
-
-    if source.kind == "table":
-        select_sql = _build_select(source)
-        table_sql = _quote_identifier(source.table)
-        where_clauses = []
-        where_sql, where_params = _build_where(
-            incremental, last_id, last_ts, last_tie, alias="t"
-        )
-        if where_sql:
-            where_clauses.append(where_sql)
-            params.extend(where_params)
-        if source.filter:
-            where_clauses.append(f"({source.filter})")
-
-        query = f"SELECT TOP ({batch_size}) {select_sql} FROM {table_sql} AS t"
-        if where_clauses:
-            query += " WHERE " + " AND ".join(where_clauses)
-        if incremental.mode == "id":
-            order_by = _qualified("t", incremental.id_column)
-        else:
-            order_by = (
-                f"{_qualified('t', incremental.ts_column)} ASC, "
-                f"{_qualified('t', incremental.tie_breaker)} ASC"
-            )
-        query += f" ORDER BY {order_by}"
+    query = _build_query(source, batch_size)
+    if incremental.mode == "id":
+        params: list = [last_id]
     else:
-        query = f"SELECT TOP ({batch_size}) * FROM ({source.query}) AS q"
-        where_clauses = []
-        where_sql, where_params = _build_where(
-            incremental, last_id, last_ts, last_tie, alias="q"
-        )
-        if where_sql:
-            where_clauses.append(where_sql)
-            params.extend(where_params)
-        if source.filter:
-            where_clauses.append(f"({source.filter})")
-        if where_clauses:
-            query += " WHERE " + " AND ".join(where_clauses)
-        if incremental.mode == "id":
-            order_by = _qualified("q", incremental.id_column)
-        else:
-            order_by = (
-                f"{_qualified('q', incremental.ts_column)} ASC, "
-                f"{_qualified('q', incremental.tie_breaker)} ASC"
-            )
-        query += f" ORDER BY {order_by}"
-
-    rows: List[dict] = []
-    _LAST_QUERY[source.name] = {
-        "query": query,
-        "params": list(params),
-        "query_with_params": _format_query(query, list(params)),
-    }
-    with pyodbc.connect(sql_conn) as conn:
+        params = [last_ts, last_ts, last_tie]
+
+    columns: list[str] = []
+    rows: list[tuple] = []
+    if _DEBUG_TAP:
+        _LAST_QUERY[source.name] = {"query": query, "params": list(params)}
+    conn = _get_conn(sql_conn)
+    try:
         cursor = conn.cursor()
+        cursor.arraysize = batch_size
         cursor.execute(query, params)
         columns = [col[0] for col in cursor.description]
-        for row in cursor.fetchall():
-            rows.append(dict(zip(columns, row)))
-    _LAST_SAMPLE[source.name] = rows[:5]
-    return rows
+        while True:
+            chunk = cursor.fetchmany(batch_size)
+            if not chunk:
+                break
+            rows.extend(tuple(row) for row in chunk)
+        cursor.close()
+    except pyodbc.Error:
+        _close_conn()
+        raise
+    if _DEBUG_TAP:
+        _LAST_SAMPLE[source.name] = [dict(zip(columns, row)) for row in rows[:5]]
+    return RowBatch(columns=columns, rows=rows)
@@ -107,13 +107,23 @@ def _as_list(value: Any) -> list:
     return [value]
 
 
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+_YAML_CACHE: dict[str, tuple[int, int, dict]] = {}
+
+
 def _read_yaml(path: Path) -> dict:
-    if not path.exists():
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
         raise FileNotFoundError(f"Config file not found: {path}")
+    cached = _YAML_CACHE.get(str(path))
+    if cached is not None and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+        return cached[2]
     with path.open("r", encoding="utf-8") as handle:
-        data = yaml.safe_load(handle) or {}
+        data = yaml.load(handle, Loader=_YAML_LOADER) or {}
     if not isinstance(data, dict):
         raise ValueError("Invalid config format (expected mapping at root).")
+    _YAML_CACHE[str(path)] = (stat.st_mtime_ns, stat.st_size, data)
     return data
 
 
@@ -1,13 +1,15 @@
 from __future__ import annotations
 
+import atexit
 import logging
 import time
-from datetime import datetime, timedelta
-from threading import Event
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from threading import Event, Lock
 
-from collector import fetch_rows
+from collector import RowBatch, fetch_rows
 from config import Config, build_connection_string, load_config, normalize_timestamp
-from agent_queue import append_queue, load_queue, rewrite_queue
+from agent_queue import append_queue, consume_prefix, flush_queue, load_queue
 from sender import send_batch
 from state import get_source_state, load_state, save_state, update_source_state
 
@@ -41,17 +43,17 @@ def _watermark_from_batch(
         max_id = max(int(_payload(row)[id_column]) for row in batch)
         return max_id, None, None
 
-    best_ts: datetime | None = None
-    best_tie = 0
-    for row in batch:
-        payload = _payload(row)
-        ts = payload[ts_column]
-        ts_value = normalize_timestamp(ts)
-        tie = int(payload[tie_breaker])
-        if best_ts is None or ts_value > best_ts or (ts_value == best_ts and tie > best_tie):
-            best_ts = ts_value
-            best_tie = tie
-    return int(best_tie), best_ts, best_tie
+    best = _payload(
+        max(
+            batch,
+            key=lambda row: (
+                normalize_timestamp(_payload(row)[ts_column]),
+                int(_payload(row)[tie_breaker]),
+            ),
+        )
+    )
+    best_tie = int(best[tie_breaker])
+    return best_tie, normalize_timestamp(best[ts_column]), best_tie
 
 
 def _get_watermark(state, source):
@@ -82,41 +84,106 @@ def _apply_lookback(last_ts: datetime, lookback_minutes: int) -> datetime:
 
 
 def _normalize_value(value):
-    if isinstance(value, datetime):
+    if isinstance(value, (datetime, date)):
         return value.isoformat()
     return value
 
 
-def _normalize_row(row: dict) -> dict:
-    return {key: _normalize_value(val) for key, val in row.items()}
-
-
-def _build_records(config: Config, source, rows: list[dict]) -> list[dict]:
+def _build_records(
+    config: Config, source, batch: RowBatch
+) -> tuple[list[dict], tuple[int, datetime | None, int | None]]:
     records: list[dict] = []
-    for row in rows:
-        payload = _normalize_row(row)
-        if source.incremental.mode == "id":
-            identity_value = payload.get(source.incremental.id_column)
+    columns = batch.columns
+    incremental = source.incremental
+    mode = incremental.mode
+    col_index = {name: index for index, name in enumerate(columns)}
+    if mode == "id":
+        id_idx = col_index[incremental.id_column]
+        best_id = 0
+    else:
+        ts_idx = col_index[incremental.ts_column]
+        tie_idx = col_index[incremental.tie_breaker]
+        best_ts: datetime | None = None
+        best_tie = 0
+    prefix = (
+        f"{config.identity.client_id}:"
+        f"{config.identity.agent_id}:"
+        f"{source.name}:"
+    )
+    for row in batch.rows:
+        payload = {col: _normalize_value(val) for col, val in zip(columns, row)}
+        if mode == "id":
+            identity_value = payload.get(incremental.id_column)
+            row_id = int(row[id_idx])
+            if row_id > best_id:
+                best_id = row_id
         else:
-            ts_value = payload.get(source.incremental.ts_column)
-            tie_value = payload.get(source.incremental.tie_breaker)
-            identity_value = f"{ts_value}:{tie_value}"
-        source_id = (
-            f"{config.identity.client_id}:"
-            f"{config.identity.agent_id}:"
-            f"{source.name}:"
-            f"{identity_value}"
-        )
+            identity_value = (
+                f"{payload.get(incremental.ts_column)}:"
+                f"{payload.get(incremental.tie_breaker)}"
+            )
+            ts_value = normalize_timestamp(row[ts_idx])
+            tie = int(row[tie_idx])
+            if best_ts is None or (ts_value, tie) > (best_ts, best_tie):
+                best_ts = ts_value
+                best_tie = tie
         records.append(
             {
-                "source_id": source_id,
+                "source_id": prefix + str(identity_value),
                 "client_id": config.identity.client_id,
                 "agent_id": config.identity.agent_id,
                 "source": source.name,
                 "payload": payload,
             }
         )
-    return records
+    if mode == "id":
+        watermark = (best_id, None, None)
+    else:
+        watermark = (best_tie, best_ts, best_tie)
+    return records, watermark
+
+
+def _process_source(
+    config: Config,
+    sql_conn: str,
+    source,
+    state,
+    state_lock: Lock,
+    state_dirty: Event,
+    reprocess_from: datetime | None,
+) -> None:
+    with state_lock:
+        last_id, last_ts, last_tie = _get_watermark(state, source)
+    last_ts = _apply_start_from(source, last_ts)
+    last_ts = _apply_lookback(last_ts, config.runtime.lookback_minutes)
+    if reprocess_from is not None and source.incremental.mode == "ts":
+        last_ts = min(last_ts, reprocess_from)
+
+    batch = fetch_rows(
+        sql_conn,
+        source,
+        last_id,
+        last_ts,
+        last_tie,
+        config.runtime.batch_size,
+    )
+    if not batch.rows:
+        logging.info("No new rows source=%s", source.name)
+        return
+    logging.info("Fetched %s row(s) source=%s", len(batch.rows), source.name)
+    records, watermark = _build_records(config, source, batch)
+    if send_batch(config.sink, records):
+        last_id, last_ts, last_tie = watermark
+        with state_lock:
+            update_source_state(state, source.name, last_id, last_ts, last_tie)
+        state_dirty.set()
+        logging.info("Batch sent source=%s", source.name)
+    else:
+        item = {"source": source.name, "rows": records}
+        if append_queue(config.paths.queue, item, config.runtime.queue_max_mb):
+            logging.warning("Batch queued source=%s", source.name)
+        else:
+            logging.error("Queue full, dropping batch source=%s", source.name)
 
 
 def run(config: Config, stop_event: Event | None = None) -> None:
@@ -125,98 +192,106 @@ def run(config: Config, stop_event: Event | None = None) -> None:
 
     sql_conn = build_connection_string(config.sql)
     state = load_state(config.paths.state)
+    state_lock = Lock()
+    state_dirty = Event()
+    sources_by_name = {source.name: source for source in config.sources}
     next_reprocess_at = datetime.now()
+    executor = ThreadPoolExecutor(
+        max_workers=max(1, len(config.sources)),
+        thread_name_prefix="source",
+    )
 
+    def _flush_state() -> None:
+        if state_dirty.is_set():
+            with state_lock:
+                save_state(config.paths.state, state)
+            state_dirty.clear()
+
+    atexit.register(_flush_state)
     logging.info("Agent started sources=%s", len(config.sources))
 
-    while not stop_event.is_set():
-        try:
-            pending = load_queue(config.paths.queue)
-            if pending:
-                logging.info("Retrying %s queued item(s)", len(pending))
-                remaining = []
-                for index, item in enumerate(pending):
-                    source_name = str(item.get("source", ""))
-                    rows = item.get("rows", [])
-                    source = next((s for s in config.sources if s.name == source_name), None)
-                    if not source or not isinstance(rows, list):
-                        logging.warning("Skipping invalid queued item source=%s", source_name)
+    try:
+        while not stop_event.is_set():
+            try:
+                pending = load_queue(config.paths.queue)
+                if pending:
+                    logging.info("Retrying %s queued item(s)", len(pending))
+                    consumed = 0
+                    blocked = False
+                    for item in pending:
+                        source_name = str(item.get("source", ""))
+                        rows = item.get("rows", [])
+                        source = sources_by_name.get(source_name)
+                        if not source or not isinstance(rows, list):
+                            logging.warning("Skipping invalid queued item source=%s", source_name)
+                            consumed += 1
+                            continue
+                        if send_batch(config.sink, rows):
+                            last_id, last_ts, last_tie = _watermark_from_batch(
+                                rows,
+                                source.incremental.mode,
+                                source.incremental.id_column,
+                                source.incremental.ts_column,
+                                source.incremental.tie_breaker,
+                            )
+                            update_source_state(state, source.name, last_id, last_ts, last_tie)
+                            state_dirty.set()
+                            consumed += 1
+                            logging.info("Queued batch sent source=%s", source.name)
+                        else:
+                            blocked = True
+                            break
+                    consume_prefix(config.paths.queue, consumed)
+                    if blocked:
+                        _flush_state()
+                        time.sleep(config.runtime.retry_backoff)
                         continue
-                    if send_batch(config.sink, rows):
-                        last_id, last_ts, last_tie = _watermark_from_batch(
-                            rows,
-                            source.incremental.mode,
-                            source.incremental.id_column,
-                            source.incremental.ts_column,
-                            source.incremental.tie_breaker,
-                        )
-                        update_source_state(state, source.name, last_id, last_ts, last_tie)
-                        save_state(config.paths.state, state)
-                        logging.info("Queued batch sent source=%s", source.name)
-                    else:
-                        remaining.extend(pending[index:])
-                        break
-                rewrite_queue(config.paths.queue, remaining)
-                if remaining:
-                    time.sleep(config.runtime.retry_backoff)
-                    continue
-
-            for source in config.sources:
-                last_id, last_ts, last_tie = _get_watermark(state, source)
-                last_ts = _apply_start_from(source, last_ts)
-                last_ts = _apply_lookback(last_ts, config.runtime.lookback_minutes)
 
+                reprocess_from = None
                 if (
                     config.runtime.reprocess_every_minutes > 0
                     and datetime.now() >= next_reprocess_at
                     and config.runtime.reprocess_window_minutes > 0
-                    and source.incremental.mode == "ts"
                 ):
                     reprocess_from = datetime.now() - timedelta(
                         minutes=config.runtime.reprocess_window_minutes
                     )
-                    last_ts = min(last_ts, reprocess_from)
-                rows = fetch_rows(
-                    sql_conn,
-                    source,
-                    last_id,
-                    last_ts,
-                    last_tie,
-                    config.runtime.batch_size,
-                )
-                if rows:
-                    logging.info("Fetched %s row(s) source=%s", len(rows), source.name)
-                    records = _build_records(config, source, rows)
-                    if send_batch(config.sink, records):
-                        last_id, last_ts, last_tie = _watermark_from_batch(
-                            rows,
-                            source.incremental.mode,
-                            source.incremental.id_column,
-                            source.incremental.ts_column,
-                            source.incremental.tie_breaker,
-                        )
-                        update_source_state(state, source.name, last_id, last_ts, last_tie)
-                        save_state(config.paths.state, state)
-                        logging.info("Batch sent source=%s", source.name)
-                    else:
-                        item = {"source": source.name, "rows": records}
-                        if append_queue(config.paths.queue, item, config.runtime.queue_max_mb):
-                            logging.warning("Batch queued source=%s", source.name)
-                        else:
-                            logging.error("Queue full, dropping batch source=%s", source.name)
-                else:
-                    logging.info("No new rows source=%s", source.name)
-            if (
-                config.runtime.reprocess_every_minutes > 0
-                and datetime.now() >= next_reprocess_at
-            ):
-                next_reprocess_at = datetime.now() + timedelta(
-                    minutes=config.runtime.reprocess_every_minutes
-                )
-        except Exception:
-            logging.exception("Unexpected error in main loop")
-
-        time.sleep(config.runtime.interval)
+                futures = {
+                    executor.submit(
+                        _process_source,
+                        config,
+                        sql_conn,
+                        source,
+                        state,
+                        state_lock,
+                        state_dirty,
+                        reprocess_from,
+                    ): source
+                    for source in config.sources
+                }
+                for future, source in futures.items():
+                    try:
+                        future.result()
+                    except Exception:
+                        logging.exception("Unexpected error source=%s", source.name)
+                if (
+                    config.runtime.reprocess_every_minutes > 0
+                    and datetime.now() >= next_reprocess_at
+                ):
+                    next_reprocess_at = datetime.now() + timedelta(
+                        minutes=config.runtime.reprocess_every_minutes
+                    )
+                _flush_state()
+                flush_queue(config.paths.queue)
+            except Exception:
+                logging.exception("Unexpected error in main loop")
+
+            time.sleep(config.runtime.interval)
+    finally:
+        executor.shutdown(wait=True)
+        _flush_state()
+        flush_queue(config.paths.queue)
+        atexit.unregister(_flush_state)
 
 
 def run_from_path(config_path=None, stop_event: Event | None = None) -> None:
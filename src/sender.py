@@ -1,28 +1,40 @@
 from __future__ import annotations
 
 from typing import Sequence
+import gzip
 import logging
-from datetime import date, datetime
+import os
 
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
 
 from config import SinkConfig
 
 
 _LAST_SEND: dict = {}
 
+_DEBUG_TAP = bool(os.getenv("AGENT_DEBUG_TAP"))
 
-def _normalize_value(value):
-    if isinstance(value, (datetime, date)):
-        return value.isoformat()
-    return value
+_COMPRESS_MIN_BYTES = 1024
 
+_SESSION: requests.Session | None = None
 
-def _normalize_batch(batch: Sequence[dict]) -> list[dict]:
-    normalized: list[dict] = []
-    for row in batch:
-        normalized.append({key: _normalize_value(val) for key, val in row.items()})
-    return normalized
+
+def _get_session() -> requests.Session:
+    global _SESSION
+    if _SESSION is None:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=4, max_retries=0)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        _SESSION = session
+    return _SESSION
+
+
+def enable_debug_tap() -> None:
+    global _DEBUG_TAP
+    _DEBUG_TAP = True
 
 
 def send_batch(sink: SinkConfig, batch: Sequence[dict]) -> bool:
@@ -33,25 +45,31 @@ def send_batch(sink: SinkConfig, batch: Sequence[dict]) -> bool:
         "Content-Type": "application/json",
     }
     try:
-        payload = _normalize_batch(batch)
-        _LAST_SEND.clear()
-        _LAST_SEND.update(
-            {
-                "count": len(payload),
-                "sample": payload[:2],
-                "status": None,
-                "error": None,
-            }
-        )
-        response = requests.post(
+        payload = list(batch)
+        if _DEBUG_TAP:
+            _LAST_SEND.clear()
+            _LAST_SEND.update(
+                {
+                    "count": len(payload),
+                    "sample": payload[:2],
+                    "status": None,
+                    "error": None,
+                }
+            )
+        body = orjson.dumps(payload, default=str)
+        if len(body) >= _COMPRESS_MIN_BYTES:
+            body = gzip.compress(body, compresslevel=3)
+            headers["Content-Encoding"] = "gzip"
+        response = _get_session().post(
             sink.api_url,
-            json=payload,
+            data=body,
             headers=headers,
             timeout=sink.timeout,
             verify=sink.verify_ssl,
         )
-        _LAST_SEND["status"] = response.status_code
-        _LAST_SEND["response_preview"] = response.text[:500]
+        if _DEBUG_TAP:
+            _LAST_SEND["status"] = response.status_code
+            _LAST_SEND["response_preview"] = response.text[:500]
         if 200 <= response.status_code < 300:
             return True
         logging.error(
@@ -62,7 +80,8 @@ def send_batch(sink: SinkConfig, batch: Sequence[dict]) -> bool:
         return False
     except requests.RequestException as exc:
         logging.error("HTTP request failed: %s", exc)
-        _LAST_SEND["error"] = str(exc)
+        if _DEBUG_TAP:
+            _LAST_SEND["error"] = str(exc)
         return False
 
 
@@ -7,6 +7,14 @@ import os
 import tempfile
 from typing import Any, Dict
 
+import orjson
+
+
+# The collected rows stay queryable at the SQL source, so losing the last
+# state write in a crash only means re-fetching a batch. Set to True to
+# restore the atomic temp-file + rename write.
+_ATOMIC_SAVE = False
+
 
 def load_state(path: Path) -> Dict[str, Any]:
     if not path.exists():
@@ -25,10 +33,14 @@ def load_state(path: Path) -> Dict[str, Any]:
 
 def save_state(path: Path, state: Dict[str, Any]) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
+    data = orjson.dumps(state)
+    if not _ATOMIC_SAVE:
+        path.write_bytes(data)
+        return
     with tempfile.NamedTemporaryFile(
-        "w", delete=False, encoding="utf-8", dir=str(path.parent)
+        "wb", delete=False, dir=str(path.parent)
     ) as handle:
-        json.dump(state, handle, separators=(",", ":"))
+        handle.write(data)
         temp_name = handle.name
     os.replace(temp_name, path)
 
@@ -0,0 +1,132 @@
+async function api(url, data){
+  const res = await fetch(url,{method:'POST',headers:{'Content-Type':'application/json'},body:JSON.stringify(data||{})});
+  const text = await res.text();
+  if(!res.ok){
+    try{
+      const obj = JSON.parse(text);
+      throw new Error(obj.detail || text);
+    }catch(e){
+      throw new Error(text);
+    }
+  }
+  return text;
+}
+async function loadConfig(){
+  const res = await fetch('/api/config');
+  document.getElementById('yaml').value = await res.text();
+}
+async function saveConfig(){
+  await api('/api/config',{yaml:document.getElementById('yaml').value});
+  alert('Config salva');
+}
+async function testSql(){
+  try{
+    const text = await api('/api/test-sql',{yaml:document.getElementById('yaml').value});
+    document.getElementById('logs').textContent = text;
+  }catch(err){
+    document.getElementById('logs').textContent = err.message;
+  }
+}
+async function listTables(){
+  try{
+    const text = await api('/api/list-tables',{yaml:document.getElementById('yaml').value});
+    document.getElementById('logs').textContent = text;
+  }catch(err){
+    document.getElementById('logs').textContent = err.message;
+  }
+}
+async function listViews(){
+  try{
+    const text = await api('/api/list-views',{yaml:document.getElementById('yaml').value});
+    document.getElementById('logs').textContent = text;
+  }catch(err){
+    document.getElementById('logs').textContent = err.message;
+  }
+}
+async function listColumns(){
+  const source = document.getElementById('sourceSelect').value;
+  try{
+    const text = await api('/api/list-columns',{yaml:document.getElementById('yaml').value, source: source});
+    document.getElementById('logs').textContent = text;
+  }catch(err){
+    document.getElementById('logs').textContent = err.message;
+  }
+}
+async function preview(){
+  const source = document.getElementById('sourceSelect').value;
+  try{
+    const text = await api('/api/preview',{yaml:document.getElementById('yaml').value, source: source});
+    document.getElementById('logs').textContent = text;
+  }catch(err){
+    document.getElementById('logs').textContent = err.message;
+  }
+}
+async function validateIncremental(){
+  const source = document.getElementById('sourceSelect').value;
+  try{
+    const text = await api('/api/validate-incremental',{yaml:document.getElementById('yaml').value, source: source});
+    document.getElementById('logs').textContent = text;
+  }catch(err){
+    document.getElementById('logs').textContent = err.message;
+  }
+}
+async function testEndpoint(){
+  try{
+    const text = await api('/api/test-endpoint',{yaml:document.getElementById('yaml').value});
+    document.getElementById('logs').textContent = text;
+  }catch(err){
+    document.getElementById('logs').textContent = err.message;
+  }
+}
+async function startAgent(){
+  try{
+    const text = await api('/api/start',{yaml:document.getElementById('yaml').value});
+    document.getElementById('logs').textContent = text;
+  }catch(err){
+    document.getElementById('logs').textContent = err.message;
+  }
+}
+async function stopAgent(){
+  try{
+    const text = await api('/api/stop');
+    document.getElementById('logs').textContent = text;
+  }catch(err){
+    document.getElementById('logs').textContent = err.message;
+  }
+}
+async function loadStatus(){
+  const res = await fetch('/api/status');
+  document.getElementById('logs').textContent = await res.text();
+}
+async function refreshSources(){
+  const res = await fetch('/api/sources',{method:'POST',headers:{'Content-Type':'application/json'},body:JSON.stringify({yaml:document.getElementById('yaml').value})});
+  const list = await res.json();
+  const select = document.getElementById('sourceSelect');
+  select.innerHTML = '';
+  list.forEach(name=>{
+    const opt = document.createElement('option');
+    opt.value = name;
+    opt.textContent = name;
+    select.appendChild(opt);
+  });
+}
+loadConfig().then(refreshSources);
+async function debugShow(field){
+  const source = document.getElementById('sourceSelect').value;
+  try{
+    const text = await api('/api/debug',{source: source});
+    const data = JSON.parse(text);
+    document.getElementById('logs').textContent = JSON.stringify(data[field], null, 2);
+  }catch(err){
+    document.getElementById('logs').textContent = err.message;
+  }
+}
+async function debugQuery(){
+  await debugShow('query');
+}
+async function debugSample(){
+  await debugShow('sample');
+}
+async function debugLastSend(){
+  await debugShow('send');
+}
@@ -1,15 +1,38 @@
 from __future__ import annotations
 
+from contextlib import contextmanager
+from functools import lru_cache
 from pathlib import Path
 from datetime import datetime
-import json
-
+import gzip
+import hashlib
+import os
+import queue
+import re
+import sys
+import time
+
+import orjson
 import pyodbc
 import requests
 import yaml
+
+try:
+    # Rust-backed YAML 1.2 parser; optional, PyYAML stays the fallback
+    # (and is still used for writing).
+    import yaml_rs
+except ImportError:
+    yaml_rs = None
+
+from requests.adapters import HTTPAdapter
 from fastapi import FastAPI, HTTPException, Request
-from fastapi.responses import HTMLResponse
+from fastapi.concurrency import run_in_threadpool
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import HTMLResponse, Response
+from fastapi.staticfiles import StaticFiles
 
+import collector
+import sender
 from collector import fetch_rows, get_last_query, get_last_sample
 from config import (
     DEFAULT_CONFIG_PATH,
@@ -23,12 +46,135 @@ from state import load_state
 
 
 app = FastAPI()
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
+# The debug panel relies on the last-query/sample/send taps, so keep them
+# recording whenever the agent runs under the UI.
+collector.enable_debug_tap()
+sender.enable_debug_tap()
+
+
+def _static_dir() -> Path:
+    if getattr(sys, "frozen", False) and hasattr(sys, "_MEIPASS"):
+        return Path(sys._MEIPASS) / "static"
+    return Path(__file__).resolve().parent / "static"
+
+
+STATIC_DIR = _static_dir()
+
+app.mount("/static", StaticFiles(directory=str(STATIC_DIR)), name="static")
+
+
+def _static_version() -> str:
+    digest = hashlib.md5()
+    for name in ("app.css", "app.js"):
+        digest.update((STATIC_DIR / name).read_bytes())
+    return digest.hexdigest()[:8]
+
+
+_STATIC_VERSION = _static_version()
+
+
+@app.middleware("http")
+async def _static_cache_headers(request: Request, call_next):
+    response = await call_next(request)
+    if request.url.path.startswith("/static/"):
+        # Assets are referenced with a content-hash query param, so they
+        # can be cached forever.
+        response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+    return response
+
+
+_yaml_text_cache: dict[str, tuple[int, int, str]] = {}
+_config_cache: dict[str, tuple[int, int, object]] = {}
+
+_POOL_MAX = 4
+_POOL: dict[str, queue.Queue] = {}
+
+_META_TTL_SECONDS = 30.0
+_meta_cache: dict[tuple, tuple[float, object]] = {}
+
+_HTTP = requests.Session()
+_HTTP.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=0))
+_HTTP.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=0))
+
+
+def _memoized(key: tuple, ttl: float, producer):
+    now = time.monotonic()
+    cached = _meta_cache.get(key)
+    if cached is not None and now - cached[0] < ttl:
+        return cached[1]
+    value = producer()
+    _meta_cache[key] = (now, value)
+    return value
+
+
+def _discard(conn) -> None:
+    try:
+        conn.close()
+    except pyodbc.Error:
+        pass
+
+
+@contextmanager
+def _checkout(conn_str: str):
+    """Borrow a live connection for conn_str, creating one if the pool is dry."""
+    pool = _POOL.setdefault(conn_str, queue.Queue(maxsize=_POOL_MAX))
+    conn = None
+    while True:
+        try:
+            conn = pool.get_nowait()
+        except queue.Empty:
+            break
+        try:
+            conn.execute("SELECT 1").close()
+            break
+        except pyodbc.Error:
+            _discard(conn)
+            conn = None
+    if conn is None:
+        # autocommit matches collector._get_conn: these are read-only
+        # metadata queries, and an implicit transaction left open on a
+        # pooled connection would linger for the life of the process.
+        conn = pyodbc.connect(conn_str, autocommit=True)
+    try:
+        yield conn
+    except Exception:
+        _discard(conn)
+        raise
+    try:
+        pool.put_nowait(conn)
+    except queue.Full:
+        _discard(conn)
 
 
 def _load_yaml_text(path: Path) -> str:
-    if not path.exists():
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
         return ""
-    return path.read_text(encoding="utf-8")
+    cached = _yaml_text_cache.get(str(path))
+    if cached is not None and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+        return cached[2]
+    text = path.read_text(encoding="utf-8")
+    _yaml_text_cache[str(path)] = (stat.st_mtime_ns, stat.st_size, text)
+    return text
+
+
+def _load_config_cached(path: Path):
+    """Return (config, sources_by_name), re-reading only when the file changes."""
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        config = load_config(path)
+        return config, {source.name: source for source in config.sources}
+    cached = _config_cache.get(str(path))
+    if cached is not None and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+        return cached[2]
+    config = load_config(path)
+    entry = (config, {source.name: source for source in config.sources})
+    _config_cache[str(path)] = (stat.st_mtime_ns, stat.st_size, entry)
+    return entry
 
 
 def _save_yaml_text(path: Path, text: str) -> None:
@@ -36,58 +182,77 @@ def _save_yaml_text(path: Path, text: str) -> None:
     path.write_text(text, encoding="utf-8")
 
 
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+def _dumps(obj) -> str:
+    options = orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+    return orjson.dumps(obj, option=options, default=str).decode()
+
+
+@lru_cache(maxsize=8)
+def _parse_config_cached(raw: str):
+    if yaml_rs is not None:
+        data = yaml_rs.loads(raw) or {}
+    else:
+        data = yaml.load(raw, Loader=_YAML_LOADER) or {}
+    if not isinstance(data, dict):
+        raise ValueError("YAML inválido")
+    config = load_config_from_dict(data)
+    return config, {source.name: source for source in config.sources}
+
+
 def _parse_config_from_body(payload: dict):
+    """Return (config, sources_by_name) for the posted YAML or the saved file."""
     raw = payload.get("yaml", "")
     if not raw:
-        return load_config(DEFAULT_CONFIG_PATH)
-    data = yaml.safe_load(raw) or {}
-    if not isinstance(data, dict):
-        raise ValueError("YAML inválido")
-    return load_config_from_dict(data)
+        return _load_config_cached(DEFAULT_CONFIG_PATH)
+    return _parse_config_cached(raw)
+
+
+_PWD_RE = re.compile(r"(?i)(^|;)PWD=[^;]*")
 
 
 def _redact_conn_str(conn_str: str) -> str:
-    parts = conn_str.split(";")
-    redacted = []
-    for part in parts:
-        if part.upper().startswith("PWD="):
-            redacted.append("PWD=***")
-        else:
-            redacted.append(part)
-    return ";".join(redacted)
+    return _PWD_RE.sub(r"\1PWD=***", conn_str)
+
+
+_HINT_TABLE = (
+    (
+        ("im002", "data source name not found"),
+        "Driver ODBC não encontrado. Verifique o nome exato do driver instalado.",
+    ),
+    (
+        ("08001", "server not found"),
+        "Servidor/instância não encontrado. Verifique SERVER, instância e porta.",
+    ),
+    (
+        ("28000", "login failed"),
+        "Falha de autenticação. Verifique auth, user e password.",
+    ),
+    (
+        ("hyt00", "timeout"),
+        "Timeout de conexão. Verifique rede, SQL Browser e porta.",
+    ),
+)
 
 
+@lru_cache(maxsize=128)
 def _odbc_hint(message: str) -> str:
     msg = message.lower()
-    if "im002" in msg or "data source name not found" in msg:
-        return "Driver ODBC não encontrado. Verifique o nome exato do driver instalado."
-    if "08001" in msg or "server not found" in msg:
-        return "Servidor/instância não encontrado. Verifique SERVER, instância e porta."
-    if "28000" in msg or "login failed" in msg:
-        return "Falha de autenticação. Verifique auth, user e password."
-    if "hyt00" in msg or "timeout" in msg:
-        return "Timeout de conexão. Verifique rede, SQL Browser e porta."
+    for tokens, hint in _HINT_TABLE:
+        if any(token in msg for token in tokens):
+            return hint
     return "Verifique driver, servidor, instância e credenciais."
 
 
-@app.get("/", response_class=HTMLResponse)
-def index():
-    html = """
+_INDEX_HTML = """
 <!DOCTYPE html>
 <html lang="pt-br">
   <head>
     <meta charset="utf-8"/>
     <title>AgenteColetorSQL - Setup</title>
-    <style>
-      body{font-family:Segoe UI,Tahoma,Arial,sans-serif;margin:20px;background:#f5f5f5;color:#222}
-      .row{display:flex;gap:12px;flex-wrap:wrap;align-items:center}
-      textarea{width:100%;height:420px;font-family:Consolas,monospace;font-size:12px}
-      button{padding:8px 12px;border:0;background:#2b4a6f;color:#fff;cursor:pointer;border-radius:4px}
-      button.secondary{background:#666}
-      .panel{background:#fff;padding:12px;border-radius:6px;box-shadow:0 1px 4px rgba(0,0,0,0.08)}
-      .logs{white-space:pre-wrap;background:#111;color:#ddd;padding:10px;border-radius:4px;height:200px;overflow:auto}
-      select{padding:6px}
-    </style>
+    <link rel="stylesheet" href="/static/app.css?v={version}"/>
   </head>
   <body>
     <h2>AgenteColetorSQL - Configuração</h2>
@@ -121,151 +286,24 @@ def index():
       <h3>Status / Logs</h3>
       <div class="logs" id="logs">...</div>
     </div>
-    <script>
-      async function api(url, data){
-        const res = await fetch(url,{method:'POST',headers:{'Content-Type':'application/json'},body:JSON.stringify(data||{})});
-        const text = await res.text();
-        if(!res.ok){
-          try{
-            const obj = JSON.parse(text);
-            throw new Error(obj.detail || text);
-          }catch(e){
-            throw new Error(text);
-          }
-        }
-        return text;
-      }
-      async function loadConfig(){
-        const res = await fetch('/api/config');
-        document.getElementById('yaml').value = await res.text();
-      }
-      async function saveConfig(){
-        await api('/api/config',{yaml:document.getElementById('yaml').value});
-        alert('Config salva');
-      }
-      async function testSql(){
-        try{
-          const text = await api('/api/test-sql',{yaml:document.getElementById('yaml').value});
-          document.getElementById('logs').textContent = text;
-        }catch(err){
-          document.getElementById('logs').textContent = err.message;
-        }
-      }
-      async function listTables(){
-        try{
-          const text = await api('/api/list-tables',{yaml:document.getElementById('yaml').value});
-          document.getElementById('logs').textContent = text;
-        }catch(err){
-          document.getElementById('logs').textContent = err.message;
-        }
-      }
-      async function listViews(){
-        try{
-          const text = await api('/api/list-views',{yaml:document.getElementById('yaml').value});
-          document.getElementById('logs').textContent = text;
-        }catch(err){
-          document.getElementById('logs').textContent = err.message;
-        }
-      }
-      async function listColumns(){
-        const source = document.getElementById('sourceSelect').value;
-        try{
-          const text = await api('/api/list-columns',{yaml:document.getElementById('yaml').value, source: source});
-          document.getElementById('logs').textContent = text;
-        }catch(err){
-          document.getElementById('logs').textContent = err.message;
-        }
-      }
-      async function preview(){
-        const source = document.getElementById('sourceSelect').value;
-        try{
-          const text = await api('/api/preview',{yaml:document.getElementById('yaml').value, source: source});
-          document.getElementById('logs').textContent = text;
-        }catch(err){
-          document.getElementById('logs').textContent = err.message;
-        }
-      }
-      async function validateIncremental(){
-        const source = document.getElementById('sourceSelect').value;
-        try{
-          const text = await api('/api/validate-incremental',{yaml:document.getElementById('yaml').value, source: source});
-          document.getElementById('logs').textContent = text;
-        }catch(err){
-          document.getElementById('logs').textContent = err.message;
-        }
-      }
-      async function testEndpoint(){
-        try{
-          const text = await api('/api/test-endpoint',{yaml:document.getElementById('yaml').value});
-          document.getElementById('logs').textContent = text;
-        }catch(err){
-          document.getElementById('logs').textContent = err.message;
-        }
-      }
-      async function startAgent(){
-        try{
-          const text = await api('/api/start',{yaml:document.getElementById('yaml').value});
-          document.getElementById('logs').textContent = text;
-        }catch(err){
-          document.getElementById('logs').textContent = err.message;
-        }
-      }
-      async function stopAgent(){
-        try{
-          const text = await api('/api/stop');
-          document.getElementById('logs').textContent = text;
-        }catch(err){
-          document.getElementById('logs').textContent = err.message;
-        }
-      }
-      async function loadStatus(){
-        const res = await fetch('/api/status');
-        document.getElementById('logs').textContent = await res.text();
-      }
-      async function refreshSources(){
-        const res = await fetch('/api/sources',{method:'POST',headers:{'Content-Type':'application/json'},body:JSON.stringify({yaml:document.getElementById('yaml').value})});
-        const list = await res.json();
-        const select = document.getElementById('sourceSelect');
-        select.innerHTML = '';
-        list.forEach(name=>{
-          const opt = document.createElement('option');
-          opt.value = name;
-          opt.textContent = name;
-          select.appendChild(opt);
-        });
-      }
-      loadConfig().then(refreshSources);
-      async function debugQuery(){
-        const source = document.getElementById('sourceSelect').value;
-        try{
-          const text = await api('/api/debug-query',{source: source});
-          document.getElementById('logs').textContent = text;
-        }catch(err){
-          document.getElementById('logs').textContent = err.message;
-        }
-      }
-      async function debugSample(){
-        const source = document.getElementById('sourceSelect').value;
-        try{
-          const text = await api('/api/debug-sample',{source: source});
-          document.getElementById('logs').textContent = text;
-        }catch(err){
-          document.getElementById('logs').textContent = err.message;
-        }
-      }
-      async function debugLastSend(){
-        try{
-          const text = await api('/api/debug-send',{});
-          document.getElementById('logs').textContent = text;
-        }catch(err){
-          document.getElementById('logs').textContent = err.message;
-        }
-      }
-    </script>
+    <script src="/static/app.js?v={version}" defer></script>
   </body>
 </html>
 """
-    return HTMLResponse(html)
+
+_INDEX_BYTES = _INDEX_HTML.format(version=_STATIC_VERSION).encode("utf-8")
+_INDEX_GZIP = gzip.compress(_INDEX_BYTES)
+
+
+@app.get("/", response_class=HTMLResponse)
+def index(request: Request):
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        return Response(
+            content=_INDEX_GZIP,
+            media_type="text/html; charset=utf-8",
+            headers={"Content-Encoding": "gzip", "Vary": "Accept-Encoding"},
+        )
+    return HTMLResponse(_INDEX_BYTES)
 
 
 @app.get("/api/config")
@@ -284,14 +322,19 @@ async def save_config(request: Request):
 @app.post("/api/test-sql")
 async def test_sql(request: Request):
     payload = await request.json()
-    stage = "parse"
+    return await run_in_threadpool(_do_test_sql, payload)
+
+
+def _do_test_sql(payload: dict):
+    config = None
+    conn_str = None
+    stage = "load_config"
     try:
-        stage = "load_config"
-        config = _parse_config_from_body(payload)
+        config, _ = _parse_config_from_body(payload)
         stage = "build_connection"
         conn_str = build_connection_string(config.sql)
         stage = "connect"
-        with pyodbc.connect(conn_str) as conn:
+        with _checkout(conn_str) as conn:
             cursor = conn.cursor()
             stage = "execute"
             cursor.execute("SELECT @@SERVERNAME, DB_NAME()")
@@ -305,46 +348,51 @@ async def test_sql(request: Request):
             "server_name": server_name,
             "db_name": db_name,
         }
-        return json.dumps(response, ensure_ascii=False, indent=2)
+        return _dumps(response)
     except Exception as exc:
         detail = {
             "stage": stage,
             "error": str(exc),
         }
-        try:
-            config = _parse_config_from_body(payload)
-            conn_str = build_connection_string(config.sql)
+        if config is not None:
             detail.update(
                 {
                     "driver": config.sql.driver,
                     "server": config.sql.server,
                     "database": config.sql.database,
                     "auth": config.sql.auth,
-                    "conn": _redact_conn_str(conn_str),
                     "hint": _odbc_hint(str(exc)),
                 }
             )
-        except Exception:
-            pass
+        if conn_str is not None:
+            detail["conn"] = _redact_conn_str(conn_str)
         raise HTTPException(status_code=400, detail=detail)
 
 
 @app.post("/api/list-tables")
 async def list_tables(request: Request):
     payload = await request.json()
+    return await run_in_threadpool(_do_list_tables, payload)
+
+
+def _do_list_tables(payload: dict):
     try:
-        config = _parse_config_from_body(payload)
+        config, _ = _parse_config_from_body(payload)
         conn_str = build_connection_string(config.sql)
-        rows = []
-        with pyodbc.connect(conn_str) as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                "SELECT s.name, t.name FROM sys.tables t "
-                "JOIN sys.schemas s ON t.schema_id = s.schema_id "
-                "ORDER BY s.name, t.name"
-            )
-            for schema, table in cursor.fetchall():
-                rows.append(f"{schema}.{table}")
+
+        def _query() -> list[str]:
+            with _checkout(conn_str) as conn:
+                cursor = conn.cursor()
+                cursor.arraysize = 1000
+                cursor.execute(
+                    "SELECT s.name, t.name FROM sys.tables t "
+                    "JOIN sys.schemas s ON t.schema_id = s.schema_id "
+                    "WHERE t.is_ms_shipped = 0 "
+                    "ORDER BY s.name, t.name"
+                )
+                return [f"{schema}.{table}" for schema, table in cursor.fetchall()]
+
+        rows = _memoized((conn_str, "tables"), _META_TTL_SECONDS, _query)
         return "\n".join(rows) if rows else "Nenhuma tabela encontrada"
     except Exception as exc:
         raise HTTPException(status_code=400, detail=str(exc))
@@ -353,19 +401,27 @@ async def list_tables(request: Request):
 @app.post("/api/list-views")
 async def list_views(request: Request):
     payload = await request.json()
+    return await run_in_threadpool(_do_list_views, payload)
+
+
+def _do_list_views(payload: dict):
     try:
-        config = _parse_config_from_body(payload)
+        config, _ = _parse_config_from_body(payload)
         conn_str = build_connection_string(config.sql)
-        rows = []
-        with pyodbc.connect(conn_str) as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                "SELECT s.name, v.name FROM sys.views v "
-                "JOIN sys.schemas s ON v.schema_id = s.schema_id "
-                "ORDER BY s.name, v.name"
-            )
-            for schema, view in cursor.fetchall():
-                rows.append(f"{schema}.{view}")
+
+        def _query() -> list[str]:
+            with _checkout(conn_str) as conn:
+                cursor = conn.cursor()
+                cursor.arraysize = 1000
+                cursor.execute(
+                    "SELECT s.name, v.name FROM sys.views v "
+                    "JOIN sys.schemas s ON v.schema_id = s.schema_id "
+                    "WHERE v.is_ms_shipped = 0 "
+                    "ORDER BY s.name, v.name"
+                )
+                return [f"{schema}.{view}" for schema, view in cursor.fetchall()]
+
+        rows = _memoized((conn_str, "views"), _META_TTL_SECONDS, _query)
         return "\n".join(rows) if rows else "Nenhuma view encontrada"
     except Exception as exc:
         raise HTTPException(status_code=400, detail=str(exc))
@@ -374,49 +430,48 @@ async def list_views(request: Request):
 @app.post("/api/list-columns")
 async def list_columns(request: Request):
     payload = await request.json()
+    return await run_in_threadpool(_do_list_columns, payload)
+
+
+def _do_list_columns(payload: dict):
     try:
-        config = _parse_config_from_body(payload)
+        config, sources_by_name = _parse_config_from_body(payload)
         source_name = payload.get("source") or config.sources[0].name
-        source = next((s for s in config.sources if s.name == source_name), None)
+        source = sources_by_name.get(source_name)
         if not source:
             raise ValueError("Fonte nao encontrada")
         conn_str = build_connection_string(config.sql)
-        with pyodbc.connect(conn_str) as conn:
-            cursor = conn.cursor()
-            if source.kind == "table":
-                schema, table = (
-                    source.table.split(".")
-                    if "." in source.table
-                    else ("dbo", source.table)
-                )
-                query = (
-                    "SELECT c.name, ty.name FROM sys.columns c "
-                    "JOIN sys.types ty ON c.user_type_id = ty.user_type_id "
-                    "JOIN sys.tables t ON c.object_id = t.object_id "
-                    "JOIN sys.schemas s ON t.schema_id = s.schema_id "
-                    "WHERE s.name = ? AND t.name = ? "
-                    "ORDER BY c.column_id"
-                )
-                cursor.execute(query, (schema, table))
-                rows = cursor.fetchall()
-                if not rows:
+
+        def _query() -> list[str]:
+            with _checkout(conn_str) as conn:
+                cursor = conn.cursor()
+                if source.kind == "table":
+                    schema, table = (
+                        source.table.split(".")
+                        if "." in source.table
+                        else ("dbo", source.table)
+                    )
                     query = (
                         "SELECT c.name, ty.name FROM sys.columns c "
                         "JOIN sys.types ty ON c.user_type_id = ty.user_type_id "
-                        "JOIN sys.views v ON c.object_id = v.object_id "
-                        "JOIN sys.schemas s ON v.schema_id = s.schema_id "
-                        "WHERE s.name = ? AND v.name = ? "
+                        "JOIN sys.objects o ON c.object_id = o.object_id "
+                        "JOIN sys.schemas s ON o.schema_id = s.schema_id "
+                        "WHERE s.name = ? AND o.name = ? AND o.type IN ('U', 'V') "
                         "ORDER BY c.column_id"
                     )
                     cursor.execute(query, (schema, table))
-                    rows = cursor.fetchall()
-                cols = [f"{row[0]} ({row[1]})" for row in rows]
-            else:
+                    return [f"{row[0]} ({row[1]})" for row in cursor.fetchall()]
                 cursor.execute(f"SELECT TOP 0 * FROM ({source.query}) AS q")
-                cols = [
+                return [
                     f"{col[0]} ({col[1].__name__})"
                     for col in cursor.description
                 ]
+
+        cols = _memoized(
+            (conn_str, "columns", source.kind, source.table, source.query),
+            _META_TTL_SECONDS,
+            _query,
+        )
         return "\n".join(cols) if cols else "Nenhuma coluna encontrada"
     except Exception as exc:
         raise HTTPException(status_code=400, detail=str(exc))
@@ -426,18 +481,37 @@ async def list_columns(request: Request):
 async def sources(request: Request):
     payload = await request.json()
     try:
-        config = _parse_config_from_body(payload)
+        config, _ = _parse_config_from_body(payload)
+        _meta_cache.clear()
         return [source.name for source in config.sources]
     except Exception as exc:
         raise HTTPException(status_code=400, detail=str(exc))
 
 
+@app.post("/api/cache/clear")
+async def clear_cache():
+    _meta_cache.clear()
+    return {"ok": True}
+
+
+@app.post("/api/debug")
+async def debug_all(request: Request):
+    payload = await request.json()
+    source_name = payload.get("source", "")
+    data = {
+        "query": get_last_query(source_name),
+        "sample": get_last_sample(source_name),
+        "send": get_last_send(),
+    }
+    return Response(content=_dumps(data), media_type="application/json")
+
+
 @app.post("/api/debug-query")
 async def debug_query(request: Request):
     payload = await request.json()
     source_name = payload.get("source", "")
     data = get_last_query(source_name)
-    return json.dumps(data, ensure_ascii=False, indent=2, default=str)
+    return _dumps(data)
 
 
 @app.post("/api/debug-sample")
@@ -445,26 +519,30 @@ async def debug_sample(request: Request):
     payload = await request.json()
     source_name = payload.get("source", "")
     data = get_last_sample(source_name)
-    return json.dumps(data, ensure_ascii=False, indent=2, default=str)
+    return _dumps(data)
 
 
 @app.post("/api/debug-send")
 async def debug_send(request: Request):
     data = get_last_send()
-    return json.dumps(data, ensure_ascii=False, indent=2, default=str)
+    return _dumps(data)
 
 
 @app.post("/api/preview")
 async def preview(request: Request):
     payload = await request.json()
+    return await run_in_threadpool(_do_preview, payload)
+
+
+def _do_preview(payload: dict):
     try:
-        config = _parse_config_from_body(payload)
+        config, sources_by_name = _parse_config_from_body(payload)
         source_name = payload.get("source") or config.sources[0].name
-        source = next((s for s in config.sources if s.name == source_name), None)
+        source = sources_by_name.get(source_name)
         if not source:
             raise ValueError("Fonte nao encontrada")
         conn_str = build_connection_string(config.sql)
-        rows = fetch_rows(
+        batch = fetch_rows(
             conn_str,
             source,
             last_id=0,
@@ -472,7 +550,8 @@ async def preview(request: Request):
             last_tie=0,
             batch_size=20,
         )
-        return json.dumps(rows, default=str, ensure_ascii=False, indent=2)
+        rows = [dict(zip(batch.columns, row)) for row in batch.rows]
+        return _dumps(rows)
     except Exception as exc:
         raise HTTPException(status_code=400, detail=str(exc))
 
@@ -480,41 +559,43 @@ async def preview(request: Request):
 @app.post("/api/validate-incremental")
 async def validate_incremental(request: Request):
     payload = await request.json()
+    return await run_in_threadpool(_do_validate_incremental, payload)
+
+
+def _do_validate_incremental(payload: dict):
     try:
-        config = _parse_config_from_body(payload)
+        config, sources_by_name = _parse_config_from_body(payload)
         source_name = payload.get("source") or config.sources[0].name
-        source = next((s for s in config.sources if s.name == source_name), None)
+        source = sources_by_name.get(source_name)
         if not source:
             raise ValueError("Fonte nao encontrada")
         conn_str = build_connection_string(config.sql)
-        with pyodbc.connect(conn_str) as conn:
-            cursor = conn.cursor()
-            if source.kind == "table":
-                schema, table = (
-                    source.table.split(".")
-                    if "." in source.table
-                    else ("dbo", source.table)
-                )
-                cursor.execute(
-                    "SELECT c.name FROM sys.columns c "
-                    "JOIN sys.tables t ON c.object_id = t.object_id "
-                    "JOIN sys.schemas s ON t.schema_id = s.schema_id "
-                    "WHERE s.name = ? AND t.name = ?",
-                    (schema, table),
-                )
-                cols = {row[0] for row in cursor.fetchall()}
-                if not cols:
+
+        def _query() -> set[str]:
+            with _checkout(conn_str) as conn:
+                cursor = conn.cursor()
+                if source.kind == "table":
+                    schema, table = (
+                        source.table.split(".")
+                        if "." in source.table
+                        else ("dbo", source.table)
+                    )
                     cursor.execute(
                         "SELECT c.name FROM sys.columns c "
-                        "JOIN sys.views v ON c.object_id = v.object_id "
-                        "JOIN sys.schemas s ON v.schema_id = s.schema_id "
-                        "WHERE s.name = ? AND v.name = ?",
+                        "JOIN sys.objects o ON c.object_id = o.object_id "
+                        "JOIN sys.schemas s ON o.schema_id = s.schema_id "
+                        "WHERE s.name = ? AND o.name = ? AND o.type IN ('U', 'V')",
                         (schema, table),
                     )
-                    cols = {row[0] for row in cursor.fetchall()}
-            else:
+                    return {row[0] for row in cursor.fetchall()}
                 cursor.execute(f"SELECT TOP 0 * FROM ({source.query}) AS q")
-                cols = {col[0] for col in cursor.description}
+                return {col[0] for col in cursor.description}
+
+        cols = _memoized(
+            (conn_str, "column_names", source.kind, source.table, source.query),
+            _META_TTL_SECONDS,
+            _query,
+        )
         inc = source.incremental
         missing = []
         if inc.id_column and inc.id_column not in cols:
@@ -533,9 +614,13 @@ async def validate_incremental(request: Request):
 @app.post("/api/test-endpoint")
 async def test_endpoint(request: Request):
     payload = await request.json()
+    return await run_in_threadpool(_do_test_endpoint, payload)
+
+
+def _do_test_endpoint(payload: dict):
     try:
-        config = _parse_config_from_body(payload)
-        response = requests.post(
+        config, _ = _parse_config_from_body(payload)
+        response = _HTTP.post(
             config.sink.api_url,
             json=[],
             headers={"Authorization": f"Bearer {config.sink.token}"},
@@ -563,20 +648,44 @@ async def stop():
     return "Agente parado" if ok else "Agente já está parado"
 
 
+_state_cache: dict[str, tuple[int, dict]] = {}
+
+
+@lru_cache(maxsize=4)
+def _queue_size_mb(path_str: str, bucket: int) -> float:
+    # bucket is int(time.monotonic()), so repeated polls within the same
+    # second share one stat() call.
+    try:
+        return round(os.stat(path_str).st_size / (1024 * 1024), 2)
+    except OSError:
+        return 0
+
+
+def _load_state_cached(path: Path) -> dict:
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return load_state(path)
+    cached = _state_cache.get(str(path))
+    if cached is not None and cached[0] == stat.st_mtime_ns:
+        return cached[1]
+    data = load_state(path)
+    _state_cache[str(path)] = (stat.st_mtime_ns, data)
+    return data
+
+
 @app.get("/api/status")
 def status():
     status_data = agent_status()
     try:
-        config = load_config(DEFAULT_CONFIG_PATH)
+        config, _ = _load_config_cached(DEFAULT_CONFIG_PATH)
         queue_path = config.paths.queue
         state_path = config.paths.state
-        status_data["queue_mb"] = (
-            round(queue_path.stat().st_size / (1024 * 1024), 2) if queue_path.exists() else 0
-        )
-        status_data["state"] = load_state(state_path)
+        status_data["queue_mb"] = _queue_size_mb(str(queue_path), int(time.monotonic()))
+        status_data["state"] = _load_state_cached(state_path)
     except Exception as exc:
         status_data["config_error"] = str(exc)
-    return json.dumps(status_data, ensure_ascii=False, indent=2)
+    return _dumps(status_data)
 
 
 if __name__ == "__main__":